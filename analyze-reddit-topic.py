@@ -13,84 +13,407 @@
 #    REDDIT_CLIENT_SECRET=your_reddit_client_secret
 #    REDDIT_USER_AGENT=your_reddit_user_agent
 #    OPENAI_API_KEY=your_openai_api_key
+#    OPENAI_CACHE_FILE=openai_cache.db (optional, where analyses are cached between runs)
+#    SEMANTIC_CACHE_FILE=semantic_cache (optional, prefix of the .npy/.json files holding near-duplicate post analyses)
 # 3. Run the script: python analyze-reddit-topic.py
 
-import praw
+import aiohttp
+import asyncio
+import hashlib
 import openai
 import os
 import json
+import numpy as np
+import orjson
 import random
-import re
+import sqlite3
+from collections import OrderedDict, deque
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Set up Reddit API client
-reddit = praw.Reddit(
-    client_id=os.getenv("REDDIT_CLIENT_ID"),
-    client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
-    user_agent=os.getenv("REDDIT_USER_AGENT")
-)
+# Reddit API credentials, used for application-only OAuth against the raw JSON endpoints
+REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID")
+REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET")
+REDDIT_USER_AGENT = os.getenv("REDDIT_USER_AGENT")
+
+REDDIT_TOKEN_URL = "https://www.reddit.com/api/v1/access_token"
+REDDIT_API_URL = "https://oauth.reddit.com"
+
+# Maximum number of comments per post sent to OpenAI, which bounds the input tokens per post
+MAX_COMMENTS = 50
+
+# Maximum number of Reddit requests in flight at once
+MAX_CONCURRENT_REDDIT_REQUESTS = 8
+
+# Reddit allows 100 requests per minute for OAuth clients, requests are spaced out to stay under it
+REDDIT_REQUESTS_PER_MINUTE = 100
+
+# Number of times a rate limited or failed Reddit request is retried, waiting REDDIT_RETRY_BACKOFF * 2 ** attempt
+# seconds in between unless Reddit says how long to wait
+REDDIT_MAX_RETRIES = 3
+REDDIT_RETRY_BACKOFF = 1.0
 
 # Set up OpenAI API client
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Maximum number of OpenAI requests in flight at once, to stay within rate limits
+MAX_CONCURRENT_REQUESTS = 8
+
+OPENAI_MODEL = "gpt-4o-mini"
+
+# Set up the local cache of OpenAI analyses, so re-runs don't pay for the same prompt twice
+cache_db = sqlite3.connect(os.getenv("OPENAI_CACHE_FILE", "openai_cache.db"))
+cache_db.execute("PRAGMA journal_mode=WAL")
+cache_db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, response TEXT NOT NULL)")
+
+# Statuses the model may assign to a post
+ANALYSIS_STATUSES = ("feature_supported", "feature_not_supported", "feature_supported_but_not_easy_to_use", "not_relevant")
+
+def is_valid_analysis(analysis):
+    """
+    Check that an analysis has the fields the output needs, before it is cached or written.
+    
+    :param analysis: Analysis results from OpenAI
+    :return: True if the summary, status and any question fields are well-formed
+    """
+    if not isinstance(analysis, dict):
+        return False
+    if not isinstance(analysis.get("summary"), str) or not analysis["summary"]:
+        return False
+    if analysis.get("status") not in ANALYSIS_STATUSES:
+        return False
+    return all(isinstance(analysis.get(f"question{i}", ""), str) for i in range(1, 4))
+
+def get_cache_key(system_message, prompt):
+    """
+    Compute the cache key of a single post's analysis.
+    
+    :param system_message: System message for the model
+    :param prompt: Part of the user prompt describing the post
+    :return: Hex digest identifying the request
+    """
+    return hashlib.sha256(json.dumps(
+        {"model": OPENAI_MODEL, "sys": system_message, "user": prompt}, sort_keys=True
+    ).encode()).hexdigest()
 
-def analyze_post(subreddit_name, title, body, comments, my_platform):
+def get_cached_analysis(key):
+    """
+    Look up an analysis in the local SQLite cache.
+    
+    :param key: Cache key from get_cache_key
+    :return: Cached analysis, or None on a miss
     """
-    Analyze a Reddit post using OpenAI's GPT model.
+    row = cache_db.execute("SELECT response FROM cache WHERE key = ?", (key,)).fetchone()
+    if not row:
+        return None
+    
+    # Entries stored before analyses were validated are treated as misses, so they are analyzed again
+    analysis = orjson.loads(row[0])
+    return analysis if is_valid_analysis(analysis) else None
+
+def store_cached_analysis(key, analysis):
+    """
+    Store an analysis in the local SQLite cache.
+    
+    :param key: Cache key from get_cache_key
+    :param analysis: Analysis results from OpenAI
+    """
+    cache_db.execute("INSERT OR REPLACE INTO cache (key, response) VALUES (?, ?)", (key, orjson.dumps(analysis).decode()))
+    cache_db.commit()
+
+# Maximum number of analyses kept in memory, to dedupe posts seen more than once in a single run
+RECENT_ANALYSES_SIZE = 4096
+
+recent_analyses = OrderedDict()
+
+def get_recent_key(subreddit_name, title, body, comments, my_platform):
+    """
+    Compute the key of a post in the in-memory cache of recent analyses.
     
     :param subreddit_name: Name of the subreddit
     :param title: Title of the post
     :param body: Body of the post
     :param comments: Comments on the post
     :param my_platform: Name of the competitor platform
-    :return: Dictionary containing analysis results
+    :return: 16-byte digest identifying the post
+    """
+    return hashlib.blake2b(
+        f"{subreddit_name}|{title}|{body[:2000]}|{comments[:4000]}|{my_platform}".encode(), digest_size=16
+    ).digest()
+
+def remember_analysis(key, analysis):
+    """
+    Add an analysis to the in-memory cache, evicting the least recently used one when full.
+    
+    :param key: Key from get_recent_key
+    :param analysis: Analysis results from OpenAI
+    """
+    recent_analyses[key] = analysis
+    recent_analyses.move_to_end(key)
+    if len(recent_analyses) > RECENT_ANALYSES_SIZE:
+        recent_analyses.popitem(last=False)
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Posts whose embeddings are at least this similar are treated as re-asks of the same question
+SIMILARITY_THRESHOLD = 0.92
+
+# Number of posts analyzed in a single OpenAI request
+BATCH_SIZE = 10
+
+# Maximum number of tokens the model may generate per analyzed post
+MAX_TOKENS_PER_POST = 400
+
+class SemanticCache:
     """
-    system_message = f"""You are an AI assistant that analyzes Reddit posts about {subreddit_name} and generates competitor-related questions for the platform {my_platform}. Your responses must adhere to the following rules:
-    1. Always respond with a valid JSON object containing the keys: "summary", "status", and optionally "question1", "question2", "question3".
-    2. Each question must be complete, mentioning both {subreddit_name} and the competitor platform {my_platform}.
-    3. Only include question fields if the status is "feature_not_supported" or "feature_supported_but_not_easy_to_use".
-    4. Phrase each question from the user's perspective, first mentioning the issue or limitation in {subreddit_name}, then asking if the competitor platform {my_platform} provides support for it.
-    5. Use this format for questions: "I am facing [problem] in {subreddit_name}. Does {my_platform} provide support for [feature] (or make it easier)?"
+    Cache of analyses keyed on post embeddings, used to skip near-duplicate posts.
+    
+    Embeddings are stored L2-normalized, so cosine similarity is a dot product.
+    Each entry is scoped to a (subreddit, platform) pair, since the analysis depends on both,
+    and each scope keeps its own embedding matrix, grown by doubling so adding a post is amortized O(1).
     """
+    def __init__(self, path_prefix):
+        self.embeddings_file = f"{path_prefix}.npy"
+        self.entries_file = f"{path_prefix}.json"
+        # Maps (subreddit name, competitor platform) to {"embeddings": matrix with spare rows, "analyses": list}
+        self.scopes = {}
+        
+        if os.path.exists(self.embeddings_file) and os.path.exists(self.entries_file):
+            embeddings = np.load(self.embeddings_file)
+            with open(self.entries_file, "rb") as f:
+                entries = orjson.loads(f.read())
+            
+            # The files are replaced one after the other, so a crash in between can leave them out of sync
+            if len(entries) != embeddings.shape[0]:
+                print("Semantic cache files are out of sync, starting with an empty semantic cache.")
+                return
+            for embedding, entry in zip(embeddings, entries):
+                self.add(embedding, entry["scope"], entry["analysis"])
+
+    def lookup(self, embedding, scope):
+        """
+        Find the analysis of the most similar cached post in the same scope.
+        
+        :param embedding: Normalized embedding of the post
+        :param scope: List of [subreddit name, competitor platform]
+        :return: Cached analysis, or None if no post is similar enough
+        """
+        group = self.scopes.get(tuple(scope))
+        if group is None:
+            return None
+        
+        similarities = group["embeddings"][:len(group["analyses"])] @ embedding
+        best = int(similarities.argmax())
+        if similarities[best] >= SIMILARITY_THRESHOLD and is_valid_analysis(group["analyses"][best]):
+            return group["analyses"][best]
+        return None
+
+    def add(self, embedding, scope, analysis):
+        """
+        Add the analysis of a post to the cache.
+        
+        :param embedding: Normalized embedding of the post
+        :param scope: List of [subreddit name, competitor platform]
+        :param analysis: Analysis results from OpenAI
+        """
+        group = self.scopes.setdefault(tuple(scope), {
+            "embeddings": np.empty((16, embedding.shape[0]), dtype=np.float32),
+            "analyses": []
+        })
+        size = len(group["analyses"])
+        if size == group["embeddings"].shape[0]:
+            grown = np.empty((2 * size, embedding.shape[0]), dtype=np.float32)
+            grown[:size] = group["embeddings"]
+            group["embeddings"] = grown
+        group["embeddings"][size] = embedding
+        group["analyses"].append(analysis)
 
-    prompt = f"""
-    Analyze the following Reddit post and its comments, then provide:
+    def save(self):
+        """
+        Persist the cache to disk.
+        
+        Each file is written to a temporary path first and then moved into place, so it is never left half-written.
+        """
+        embeddings = []
+        entries = []
+        for scope, group in self.scopes.items():
+            embeddings.append(group["embeddings"][:len(group["analyses"])])
+            entries.extend({"scope": list(scope), "analysis": analysis} for analysis in group["analyses"])
+        
+        with open(f"{self.embeddings_file}.tmp", "wb") as f:
+            np.save(f, np.concatenate(embeddings) if embeddings else np.empty((0, 0), dtype=np.float32))
+        with open(f"{self.entries_file}.tmp", "wb") as f:
+            f.write(orjson.dumps(entries))
+        os.replace(f"{self.embeddings_file}.tmp", self.embeddings_file)
+        os.replace(f"{self.entries_file}.tmp", self.entries_file)
+
+semantic_cache = SemanticCache(os.getenv("SEMANTIC_CACHE_FILE", "semantic_cache"))
+
+async def embed_posts(posts):
+    """
+    Embed Reddit posts for near-duplicate detection.
+    
+    :param posts: List of (title, body, comments) tuples
+    :return: List of L2-normalized embeddings as NumPy arrays, or None on failure
+    """
+    try:
+        response = await client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=[f"{title}\n{body[:500]}" for title, body, _ in posts]
+        )
+    except Exception as e:
+        print(f"Error calling OpenAI embeddings API: {str(e)}")
+        return None
+    
+    embeddings = np.array([item.embedding for item in response.data], dtype=np.float32)
+    return list(embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True))
+
+# Static instructions, kept free of per-post values so OpenAI's prompt cache can reuse the prefix
+SYSTEM_MESSAGE = """You are an AI assistant that analyzes Reddit posts about an analyzed platform and generates competitor-related questions for a competitor platform. Both platforms are named at the start of each user message, followed by a JSON array of posts, each with an "id", "title", "body" and "comments". Your responses must adhere to the following rules:
+    1. Always respond with a valid JSON object containing the key "analyses": an array with one analysis per post, in the same order as the posts.
+    2. Each analysis is an object containing the keys: "id" (the id of the analyzed post), "summary", "status", and optionally "question1", "question2", "question3".
+    3. Each question must be complete, mentioning both the analyzed platform and the competitor platform by name.
+    4. Only include question fields if the status is "feature_not_supported" or "feature_supported_but_not_easy_to_use".
+    5. Phrase each question from the user's perspective, first mentioning the issue or limitation in the analyzed platform, then asking if the competitor platform provides support for it.
+    6. Use this format for questions: "I am facing [problem] in [analyzed platform]. Does [competitor platform] provide support for [feature] (or make it easier)?"
+
+    Analyze each Reddit post and its comments given by the user, then provide:
     1. A one-line summary of the topic being discussed, phrased as a question.
-    2. Whether the post is discussing an {subreddit_name} feature, and if so, whether {subreddit_name} supports it.
+    2. Whether the post is discussing a feature of the analyzed platform, and if so, whether the analyzed platform supports it.
     Use one of these statuses:
-    - "feature_supported": The feature is supported by {subreddit_name}
-    - "feature_not_supported": The feature is not supported by  {subreddit_name}
+    - "feature_supported": The feature is supported by the analyzed platform
+    - "feature_not_supported": The feature is not supported by the analyzed platform
     - "feature_supported_but_not_easy_to_use": The feature is supported but difficult to implement
-    - "not_relevant": The post is not discussing a specific  {subreddit_name} feature
+    - "not_relevant": The post is not discussing a specific feature of the analyzed platform
 
-    3. If the status is "feature_not_supported" or "feature_supported_but_not_easy_to_use", provide 3 complete questions to ask about competitor {my_platform}. Each question should first mention the issue in {subreddit_name}, then ask if it's possible or easier to achieve in {my_platform}.
-
-    Title: {title}
-    Body: {body}
-    Comments:
-    {comments}
+    3. If the status is "feature_not_supported" or "feature_supported_but_not_easy_to_use", provide 3 complete questions to ask about the competitor platform. Each question should first mention the issue in the analyzed platform, then ask if it's possible or easier to achieve in the competitor platform.
 
     Respond with a JSON object in the following format:
-    {{
-        "summary": "<one-line summary as a question>",
-        "status": "<feature status>",
-        "question1": "<complete competitor question 1>",
-        "question2": "<complete competitor question 2>",
-        "question3": "<complete competitor question 3>"
-    }}
+    {
+        "analyses": [
+            {
+                "id": <id of the post>,
+                "summary": "<one-line summary as a question>",
+                "status": "<feature status>",
+                "question1": "<complete competitor question 1>",
+                "question2": "<complete competitor question 2>",
+                "question3": "<complete competitor question 3>"
+            }
+        ]
+    }
+
+    Note: Include the question fields only if the status is "feature_not_supported" or "feature_supported_but_not_easy_to_use". Each question should be from the user's perspective, mentioning the analyzed platform's issue first, then asking about the competitor platform.
+    """
+
+# Names the platforms at the start of the user prompt, formatted once per subreddit
+PROMPT_HEADER_TEMPLATE = "The analyzed platform is {subreddit_name}. The competitor platform is {my_platform}."
+
+async def analyze_posts(subreddit_name, posts, my_platform, system_message, prompt_header):
+    """
+    Analyze a batch of Reddit posts using OpenAI's GPT model in a single request.
+    
+    Posts that were already analyzed in this run, are near-duplicates of earlier posts,
+    or were analyzed in a previous run, are answered from the caches and left out of the request.
+    
+    :param subreddit_name: Name of the subreddit
+    :param posts: List of (title, body, comments) tuples
+    :param my_platform: Name of the competitor platform
+    :param system_message: Static system message for the model
+    :param prompt_header: Start of the user prompt naming the platforms, from PROMPT_HEADER_TEMPLATE
+    :return: List of dictionaries containing analysis results, one per post
+    """
+    analyses = [{} for _ in posts]
+    scope = [subreddit_name, my_platform]
+    
+    recent_keys = [get_recent_key(subreddit_name, *post, my_platform) for post in posts]
+    uncached = []
+    for i, key in enumerate(recent_keys):
+        if key in recent_analyses:
+            recent_analyses.move_to_end(key)
+            analyses[i] = recent_analyses[key]
+        else:
+            uncached.append(i)
+    if not uncached:
+        return analyses
+    
+    # Check the free local cache first, so only posts it misses pay for an embedding
+    cache_entries = {}
+    misses = []
+    for i in uncached:
+        title, body, comments = posts[i]
+        post_data = {"title": title, "body": body, "comments": comments}
+        key = get_cache_key(system_message, f"{prompt_header}\n{json.dumps(post_data, sort_keys=True)}")
+        cache_entries[i] = (key, post_data)
+        analysis = get_cached_analysis(key)
+        if analysis:
+            analyses[i] = analysis
+        else:
+            misses.append(i)
+    
+    embeddings = await embed_posts([posts[i] for i in misses]) if misses else None
+    if embeddings is not None:
+        embeddings = dict(zip(misses, embeddings))
+    pending = []
+    for i in misses:
+        title, body, comments = posts[i]
+        # Reuse the analysis of an earlier post asking the same thing
+        if embeddings is not None:
+            analysis = semantic_cache.lookup(embeddings[i], scope)
+            if analysis:
+                print(f"Reusing analysis of a similar post for: {title}")
+                analyses[i] = analysis
+                continue
+        
+        pending.append((i, *cache_entries[i]))
+    
+    if pending:
+        prompt = f"""{prompt_header}
 
-    Note: Include the question fields only if the status is "feature_not_supported" or "feature_supported_but_not_easy_to_use". Each question should be from the user's perspective, mentioning the {subreddit_name} issue first, then asking about {my_platform}.
+    Posts:
+    {json.dumps([{"id": i, **post_data} for i, _, post_data in pending])}
     """
+        batch_analyses = await request_analyses(system_message, prompt, len(pending))
+        missing_ids = [i for i, _, _ in pending if i not in batch_analyses]
+        if missing_ids:
+            print(f"No analysis returned for posts with ids {missing_ids} of this batch.")
+        for i, key, _ in pending:
+            analysis = batch_analyses.get(i, {})
+            if analysis:
+                store_cached_analysis(key, analysis)
+            analyses[i] = analysis
+    
+    if embeddings is not None:
+        for i, _, _ in pending:
+            if analyses[i]:
+                semantic_cache.add(embeddings[i], scope, analyses[i])
+    
+    for i in uncached:
+        if analyses[i]:
+            remember_analysis(recent_keys[i], analyses[i])
+    return analyses
 
+async def request_analyses(system_message, prompt, num_posts):
+    """
+    Send the analysis prompt to OpenAI and parse the response.
+    
+    :param system_message: System message for the model
+    :param prompt: User prompt describing the posts to analyze
+    :param num_posts: Number of posts in the prompt, used to cap the response length
+    :return: Dictionary mapping post ids to analysis results
+    """
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        response = await client.chat.completions.create(
+            model=OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            response_format={"type": "json_object"},
+            # Deterministic, bounded responses keep generation short and make them safe to cache
+            max_tokens=MAX_TOKENS_PER_POST * num_posts,
+            temperature=0
         )
         
         content = response.choices[0].message.content.strip()
@@ -99,27 +422,233 @@ def analyze_post(subreddit_name, title, body, comments, my_platform):
         print(f"Error calling OpenAI API: {str(e)}")
         return {}
 
+def parse_post_id(analysis):
+    """
+    Get the post id of an analysis in a batch response.
+    
+    The model may echo the id back as a string, so digit strings are accepted as well as integers.
+    Anything else, including floats, is rejected rather than truncated to a different post's id.
+    
+    :param analysis: Single entry of the "analyses" array
+    :return: Post id as an integer, or None if it is missing or invalid
+    """
+    if not isinstance(analysis, dict):
+        return None
+    post_id = analysis.get("id")
+    if isinstance(post_id, int) and not isinstance(post_id, bool):
+        return post_id
+    if isinstance(post_id, str) and post_id.strip().isdigit():
+        return int(post_id)
+    return None
+
 def parse_openai_response(content):
     """
-    Parse the OpenAI API response and extract the JSON content.
+    Parse the OpenAI API response and extract the analysis of each post.
     
-    :param content: Raw content from OpenAI API response
-    :return: Parsed JSON as a dictionary
+    :param content: Raw content from OpenAI API response, a JSON object
+    :return: Dictionary mapping post ids to analysis results
     """
     try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        json_match = re.search(r'\{[\s\S]*\}', content, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except json.JSONDecodeError:
-                print("Failed to extract valid JSON from the response.", content)
-        else:
-            print("No JSON-like content found in the response.", content)
-    return {}
+        analyses = orjson.loads(content).get("analyses")
+    except (orjson.JSONDecodeError, AttributeError):
+        print("Failed to parse the response as a JSON object.", content)
+        return {}
+    if not isinstance(analyses, list):
+        print("The response has no list of analyses.", content)
+        return {}
+    
+    analyses_by_id = {}
+    for analysis in analyses:
+        post_id = parse_post_id(analysis)
+        if post_id is None:
+            print("Skipping analysis without a valid post id.", analysis)
+            continue
+        del analysis["id"]
+        # Malformed analyses are dropped here, so they are never cached and the post is analyzed again next run
+        if not is_valid_analysis(analysis):
+            print(f"Skipping malformed analysis for post id {post_id}.", analysis)
+            continue
+        analyses_by_id[post_id] = analysis
+    return analyses_by_id
+
+class RedditRateLimiter:
+    """
+    Space out Reddit requests to stay within the per-minute request budget.
+    
+    Requests start at least 60 / requests_per_minute seconds apart, and when Reddit reports
+    the budget as used up through the X-Ratelimit-* headers, or asks to retry later, requests wait until then.
+    """
+    def __init__(self, requests_per_minute):
+        self.interval = 60 / requests_per_minute
+        self.next_request_at = 0.0
+
+    async def wait(self):
+        """
+        Wait until the next request may be sent.
+        """
+        now = asyncio.get_running_loop().time()
+        start = max(now, self.next_request_at)
+        self.next_request_at = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def pause(self, seconds):
+        """
+        Hold back all requests for the given number of seconds.
+        
+        :param seconds: Number of seconds to wait before the next request
+        """
+        now = asyncio.get_running_loop().time()
+        self.next_request_at = max(self.next_request_at, now + seconds)
+
+    def update(self, headers):
+        """
+        Pause until the rate limit window resets once Reddit reports no requests remaining.
+        
+        :param headers: Headers of a Reddit API response
+        """
+        try:
+            remaining = float(headers["X-Ratelimit-Remaining"])
+            reset = float(headers["X-Ratelimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        if remaining < 1:
+            self.pause(reset)
+
+reddit_rate_limiter = RedditRateLimiter(REDDIT_REQUESTS_PER_MINUTE)
+reddit_auth_lock = asyncio.Lock()
+
+async def authenticate_reddit(session):
+    """
+    Get an application-only OAuth token and attach it to the session.
+    
+    :param session: aiohttp session used for all Reddit requests
+    """
+    async with session.post(
+        REDDIT_TOKEN_URL,
+        data={"grant_type": "client_credentials"},
+        # Set as a header, so it replaces the session's expired bearer token on this request
+        headers={"Authorization": aiohttp.BasicAuth(REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET).encode()}
+    ) as response:
+        response.raise_for_status()
+        token = (await response.json())["access_token"]
+    session.headers["Authorization"] = f"bearer {token}"
+
+async def reauthenticate_reddit(session, rejected_authorization):
+    """
+    Replace an expired OAuth token, unless another request already replaced it.
+    
+    :param session: aiohttp session used for all Reddit requests
+    :param rejected_authorization: Authorization header of the request that got a 401
+    """
+    async with reddit_auth_lock:
+        if session.headers.get("Authorization") == rejected_authorization:
+            print("Reddit access token expired, authenticating again")
+            await authenticate_reddit(session)
+
+def get_retry_delay(status, headers, attempt):
+    """
+    Get how long to wait before retrying a rate limited or failed Reddit request.
+    
+    X-Ratelimit-Reset is sent on every response and counts down to the end of the 10-minute rate window,
+    so it is only a retry hint for rate limited (429) responses. Server errors (5xx) only honour Retry-After.
+    
+    :param status: HTTP status of the Reddit API response, 429 or 5xx
+    :param headers: Headers of the Reddit API response
+    :param attempt: Number of the failed attempt, starting at 0
+    :return: Delay in seconds, from the headers above when present, exponential backoff otherwise
+    """
+    hint_headers = ("Retry-After", "X-Ratelimit-Reset") if status == 429 else ("Retry-After",)
+    for header in hint_headers:
+        try:
+            return float(headers[header])
+        except (KeyError, ValueError):
+            pass
+    return REDDIT_RETRY_BACKOFF * 2 ** attempt
+
+async def fetch_reddit_json(session, path, params):
+    """
+    Send a GET request to the Reddit API.
+    
+    Rate limited (429) and server error (5xx) responses and connection errors are retried with backoff,
+    and an expired token (401) is replaced before retrying.
+    
+    :param session: Authenticated aiohttp session
+    :param path: Path of the endpoint, e.g. /r/AppSheet/new
+    :param params: Query parameters
+    :return: Decoded JSON response
+    """
+    for attempt in range(REDDIT_MAX_RETRIES + 1):
+        await reddit_rate_limiter.wait()
+        authorization = session.headers.get("Authorization")
+        try:
+            async with session.get(f"{REDDIT_API_URL}{path}", params={**params, "raw_json": 1}) as response:
+                reddit_rate_limiter.update(response.headers)
+                if attempt < REDDIT_MAX_RETRIES:
+                    if response.status == 401:
+                        # Application-only tokens expire after an hour
+                        await reauthenticate_reddit(session, authorization)
+                        continue
+                    if response.status == 429 or response.status >= 500:
+                        reddit_rate_limiter.pause(get_retry_delay(response.status, response.headers, attempt))
+                        continue
+                response.raise_for_status()
+                return await response.json()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == REDDIT_MAX_RETRIES:
+                raise
+            reddit_rate_limiter.pause(REDDIT_RETRY_BACKOFF * 2 ** attempt)
+
+async def fetch_new_posts(session, subreddit_name, max_posts):
+    """
+    Fetch the newest posts of a subreddit.
+    
+    :param session: Authenticated aiohttp session
+    :param subreddit_name: Name of the subreddit
+    :param max_posts: Maximum number of posts to fetch
+    :return: List of post data dictionaries
+    """
+    posts = []
+    after = None
+    while len(posts) < max_posts:
+        # Request only as many posts as are still needed, Reddit returns at most 100 per page
+        params = {"limit": min(max_posts - len(posts), 100)}
+        if after:
+            params["after"] = after
+        listing = (await fetch_reddit_json(session, f"/r/{subreddit_name}/new", params))["data"]
+        posts.extend(child["data"] for child in listing["children"])
+        after = listing["after"]
+        if not after:
+            break
+    return posts[:max_posts]
+
+async def fetch_comments(session, post):
+    """
+    Fetch the comments of a post, formatted one per line.
+    
+    :param session: Authenticated aiohttp session
+    :param post: Post data dictionary
+    :return: Up to MAX_COMMENTS comments as "author: body" lines, in breadth-first order
+    """
+    _, comment_listing = await fetch_reddit_json(
+        session, f"/comments/{post['id']}", {"limit": MAX_COMMENTS, "depth": 10}
+    )
+    
+    lines = []
+    pending = deque(comment_listing["data"]["children"])
+    while pending and len(lines) < MAX_COMMENTS:
+        comment = pending.popleft()
+        # Skip "load more comments" stubs, the same as PRAW's replace_more(limit=0)
+        if comment["kind"] != "t1":
+            continue
+        
+        data = comment["data"]
+        lines.append(f"{data['author']}: {data['body']}")
+        if data["replies"]:
+            pending.extend(data["replies"]["data"]["children"])
+    return "\n".join(lines)
 
-def analyze_reddit_topics(subreddit_names, my_platform, output_file, max_posts=10):
+async def analyze_reddit_topics(subreddit_names, my_platform, output_file, max_posts=10):
     """
     Analyze Reddit topics from multiple subreddits.
     
@@ -128,43 +657,84 @@ def analyze_reddit_topics(subreddit_names, my_platform, output_file, max_posts=1
     :param output_file: Name of the output file
     :param max_posts: Maximum number of posts to analyze per subreddit
     """
-    all_results = [] 
-    for subreddit_name in subreddit_names:
-        subreddit = reddit.subreddit(subreddit_name)
-        posts_analyzed = 0
-        
-        for post in subreddit.new(limit=None):
-            if posts_analyzed >= max_posts:
-                break
-            
-            print(f"\nAnalyzing post: {post.title}")
-            
-            post.comments.replace_more(limit=0)
-            comments = "\n".join([f"{comment.author}: {comment.body}" for comment in post.comments.list()])
-            
-            analysis = analyze_post(subreddit_name, post.title, post.selftext, comments, my_platform)
-            if analysis and "summary" in analysis and "status" in analysis:
-                result = create_result_dict(subreddit_name, post, analysis)
-                all_results.append(result)
-                posts_analyzed += 1
-            
-                update_files(all_results, output_file)
-                
-                print(json.dumps(analysis, indent=2))
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    reddit_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REDDIT_REQUESTS)
+
+    async def analyze_with_limit(subreddit_name, batch, prompt_header):
+        async with semaphore:
+            for post, _ in batch:
+                print(f"\nAnalyzing post: {post['title']}")
+            analyses = await analyze_posts(
+                subreddit_name,
+                [(post["title"], post["selftext"], comments) for post, comments in batch],
+                my_platform,
+                SYSTEM_MESSAGE,
+                prompt_header
+            )
+            return batch, analyses
+
+    async def fetch_comments_with_limit(session, post):
+        async with reddit_semaphore:
+            try:
+                return await fetch_comments(session, post)
+            except Exception as e:
+                # Skip the post rather than losing the whole subreddit
+                print(f"Error fetching comments for post {post['title']}: {str(e)}")
+                return None
+
+    async def analyze_subreddit(session, f, subreddit_name):
+        # Fetch the posts and all their comments first, so the OpenAI calls can run concurrently
+        try:
+            new_posts = await fetch_new_posts(session, subreddit_name, max_posts)
+        except Exception as e:
+            print(f"Error fetching posts from r/{subreddit_name}: {str(e)}")
+            return
+        comments = await asyncio.gather(
+            *(fetch_comments_with_limit(session, post) for post in new_posts)
+        )
+        posts = [(post, post_comments) for post, post_comments in zip(new_posts, comments) if post_comments is not None]
+
+        # Platform names go after the static SYSTEM_MESSAGE, so its prefix is identical across calls
+        prompt_header = PROMPT_HEADER_TEMPLATE.format(subreddit_name=subreddit_name, my_platform=my_platform)
+
+        batches = [posts[i:i + BATCH_SIZE] for i in range(0, len(posts), BATCH_SIZE)]
+        for batch_task in asyncio.as_completed(
+            [analyze_with_limit(subreddit_name, batch, prompt_header) for batch in batches]
+        ):
+            batch, analyses = await batch_task
+            for (post, _), analysis in zip(batch, analyses):
+                if is_valid_analysis(analysis):
+                    result = create_result_dict(subreddit_name, post, analysis)
+                    write_result(f, result)
+
+                    print(json.dumps(analysis, indent=2))
+
+        semantic_cache.save()
+
+    # Append one JSON line per result as soon as it is ready, instead of rewriting every result after each post
+    with open(output_file, "ab") as f:
+        async with aiohttp.ClientSession(headers={"User-Agent": REDDIT_USER_AGENT}) as session:
+            await authenticate_reddit(session)
+
+            # Analyze all subreddits concurrently, so their batches share the OpenAI and Reddit semaphores
+            # and one subreddit's Reddit fetches overlap another's analysis
+            await asyncio.gather(
+                *(analyze_subreddit(session, f, subreddit_name) for subreddit_name in subreddit_names)
+            )
 
 def create_result_dict(subreddit_name, post, analysis):
     """
     Create a dictionary with the analysis results.
     
     :param subreddit_name: Name of the subreddit
-    :param post: Reddit post object
+    :param post: Reddit post data dictionary
     :param analysis: Analysis results from OpenAI
     :return: Dictionary with formatted results
     """
     result = {
         "subreddit": subreddit_name,
-        "postUrl": f"https://www.reddit.com{post.permalink}",
-        "postTitle": post.title,
+        "postUrl": f"https://www.reddit.com{post['permalink']}",
+        "postTitle": post["title"],
         "summary": analysis["summary"],
         "status": analysis["status"]
     }
@@ -177,18 +747,42 @@ def create_result_dict(subreddit_name, post, analysis):
     
     return result
 
-def update_files(results, output_file):
+def write_result(f, result):
     """
-    Update the JSON file with all results.
+    Append a result to the JSON Lines output file.
     
-    :param results: List of all analysis results
+    :param f: Output file, opened in binary append mode
+    :param result: Analysis result of a single post
     """
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=2)
+    f.write(orjson.dumps(result) + b"\n")
+    f.flush()
+
+def compact_jsonl_to_json(path):
+    """
+    Convert a JSON Lines output file into a JSON file holding a single array of results.
+    
+    :param path: Path of the JSON Lines file, the JSON file is written next to it as <stem>.compact.json
+    :return: Path of the JSON file
+    """
+    with open(path, "rb") as f:
+        results = [orjson.loads(line) for line in f if line.strip()]
+    
+    # A distinct suffix, so the input file is never overwritten
+    json_path = f"{os.path.splitext(path)[0]}.compact.json"
+    with open(json_path, "wb") as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    return json_path
 
 if __name__ == "__main__":
     # subreddit_names = ["AppSheet", "glideapps", "Bubbleio", "zohocreator"]
     my_platform = input("Enter the name of your platform: ")
     subreddit_names = input("Enter the names of the subreddits to analyze (comma-separated, no spaces): ").split(',')
-    output_file = input("Enter the name of the output JSON file: ")
-    analyze_reddit_topics(subreddit_names, my_platform, output_file)
+    output_file = input("Enter the name of the output JSON Lines (.jsonl) file: ")
+    # Results are appended line by line, so never write into an existing JSON array file from an older run
+    if not output_file.endswith(".jsonl"):
+        output_file = f"{os.path.splitext(output_file)[0]}.jsonl"
+        print(f"Writing results to {output_file}")
+    compact = input("Also save the results as a single JSON array when done? (y/n): ").strip().lower() == "y"
+    asyncio.run(analyze_reddit_topics(subreddit_names, my_platform, output_file))
+    if compact and os.path.exists(output_file):
+        print(f"Saved the results as a JSON array to {compact_jsonl_to_json(output_file)}")
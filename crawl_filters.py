@@ -0,0 +1,48 @@
+from typing import Final, List, Set, Tuple
+from urllib.parse import urljoin, urlparse
+
+"""
+Anchor filtering for get-all-child-pages.py, kept in its own fully typed module so it can be compiled with mypyc.
+
+To compile it into a C extension, run the following commands from this directory:
+pip install mypy
+mypyc crawl_filters.py
+
+Python imports the compiled extension in place of this file when it is present, and falls back to this file otherwise.
+"""
+
+
+# Only links which start with one of these prefixes are followed
+_ALLOWED_PREFIXES: Final[Tuple[str, ...]] = ('https://', '/')
+
+# Links to files with these extensions are not crawled, since they hold no anchors
+_SKIP_EXTENSIONS: Final[Tuple[str, ...]] = (
+    '.pdf', '.zip', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.mp4', '.webm',
+    '.css', '.js', '.ico', '.woff', '.woff2'
+)
+
+
+def filter_anchors(hrefs: List[str], page_url: str, original_url: str, visited: Set[str]) -> List[str]:
+    new_urls: List[str] = []
+
+    for href in hrefs:
+        # Include only the links which start with https:// or /
+        if not href.startswith(_ALLOWED_PREFIXES):
+            continue
+
+        # remove the hash from the URL
+        href = href.split('#')[0]
+        # Join the href with the base URL to get the absolute URL
+        absolute_url: str = urljoin(page_url, href)
+
+        # Check if the parsed URL is a substring of the original domain, and is not a link to a file
+        if not absolute_url.startswith(original_url) or urlparse(absolute_url).path.lower().endswith(_SKIP_EXTENSIONS):
+            continue
+
+        # Check if the absolute URL is not already visited
+        if absolute_url not in visited:
+            # Mark the URL as visited when it is discovered, so other workers don't queue it again
+            visited.add(absolute_url)
+            new_urls.append(absolute_url)
+
+    return new_urls
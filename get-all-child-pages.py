@@ -1,70 +1,127 @@
+import asyncio
 import csv
-import requests
-from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
+import aiohttp
+from selectolax.lexbor import LexborHTMLParser
+from crawl_filters import filter_anchors
 
 """
-The script will recursively crawl the web page and its child pages, and save the child URLs to a CSV file named 'child_urls.csv'.
+The script will concurrently crawl the web page and its child pages, and save the child URLs to a CSV file named 'child_urls.csv'.
 
 To install the required dependencies, run the following command:
 pip install -r requirements.txt
 
+Optionally, compile the anchor filtering in crawl_filters.py into a C extension for faster crawling:
+pip install mypy
+mypyc crawl_filters.py
+
 To run the script, execute the following command:
 python get-all-child-pages.py
 """
 
 
-def crawl_page(url, visited_urls, child_urls, original_url):
+# Number of pages fetched concurrently
+CONCURRENT_REQUESTS = 32
+
+# Seconds to wait for a page before giving up on it
+REQUEST_TIMEOUT = 10
+
+# Number of times a failed request is retried, waiting RETRY_BACKOFF * 2 ** attempt seconds in between
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.3
+
+
+async def fetch(session, url):
+    # Retry on connection errors and server errors, the same way urllib3's Retry would
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with session.get(url) as response:
+                if response.status < 500 or attempt == MAX_RETRIES:
+                    # Don't download the body of non-HTML responses, it can't contain anchors
+                    if 'html' not in response.content_type:
+                        return None
+                    return await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == MAX_RETRIES:
+                raise
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+async def crawl_page(session, url, queue, visited_urls, writer, original_url):
     print(f'Crawling: {url}')
-    # Add the current URL to the visited_urls set
-    visited_urls.add(url)
 
     # Send a GET request to the URL
-    response = requests.get(url)
-    # print('Received response with status code:', response.status_code)
+    content = await fetch(session, url)
+    if content is None:
+        return
 
     # Parse the HTML content of the response
-    soup = BeautifulSoup(response.content, 'html.parser')
-
-    # Find all anchor tags in the HTML
-    for anchor in soup.find_all('a'):
-        href = anchor.get('href')
-
-        # Check if the href attribute is present and not empty, also include only the links which start with https:// or /
-        if href and href.startswith('https://') or href.startswith('/'):
-            # remove the hash from the URL
-            href = href.split('#')[0]
-            # Join the href with the base URL to get the absolute URL
-            absolute_url = urljoin(url, href)
-
-            # Check if the parsed URL is a substring of the original domain
-            if absolute_url.startswith(original_url):
-                # Check if the absolute URL is not already visited
-                if absolute_url not in visited_urls:
-                    # Add the absolute URL to the child_urls list
-                    child_urls.append(absolute_url)
-                    print('Child URL:', absolute_url)
-
-                    # Recursively crawl the child URL
-                    crawl_page(absolute_url, visited_urls, child_urls, original_url)
+    tree = LexborHTMLParser(content)
+
+    # Don't follow any links of pages marked with <meta name="robots" content="nofollow">
+    for meta in tree.css('meta[name]'):
+        name = (meta.attributes.get('name') or '').lower()
+        if name == 'robots' and 'nofollow' in (meta.attributes.get('content') or '').lower():
+            return
+
+    # Find all anchor tags in the HTML which have an href attribute, skipping links marked with rel="nofollow"
+    hrefs = []
+    for anchor in tree.css('a'):
+        href = anchor.attributes.get('href')
+        if href is not None and 'nofollow' not in (anchor.attributes.get('rel') or '').lower().split():
+            hrefs.append(href)
+
+    for absolute_url in filter_anchors(hrefs, url, original_url, visited_urls):
+        # Write the absolute URL to the CSV file as soon as it is found
+        writer.writerow([absolute_url])
+        print('Child URL:', absolute_url)
+
+        # Queue the child URL to be crawled by a worker
+        queue.put_nowait(absolute_url)
+
+async def worker(session, queue, visited_urls, writer, original_url):
+    while True:
+        url = await queue.get()
+        try:
+            await crawl_page(session, url, queue, visited_urls, writer, original_url)
+        except Exception as e:
+            print(f'Error crawling {url}: {e}')
+        finally:
+            queue.task_done()
+
+async def crawl(url, visited_urls, writer):
+    # Crawl breadth-first with a pool of workers sharing one queue of URLs
+    queue = asyncio.Queue()
+    visited_urls.add(url)
+    queue.put_nowait(url)
+
+    # Share one session for the whole crawl, so TCP and TLS connections to the site are kept alive and reused
+    connector = aiohttp.TCPConnector(limit=CONCURRENT_REQUESTS, limit_per_host=CONCURRENT_REQUESTS, keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        workers = [
+            asyncio.create_task(worker(session, queue, visited_urls, writer, url))
+            for _ in range(CONCURRENT_REQUESTS)
+        ]
+
+        # Wait until every queued URL has been crawled, then stop the idle workers
+        await queue.join()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
 
 def main():
     # Get the web page URL from the command line input
     url = input("Enter the web page URL: ")
-    original_url = url
 
-    # Set up the visited_urls set and child_urls list
+    # Set up the visited_urls set
     visited_urls = set()
-    child_urls = []
 
-    # Crawl the web page and its child pages
-    crawl_page(url, visited_urls, child_urls, original_url)
-
-    # Write the child URLs to a CSV file
-    with open('child_urls.csv', 'w', newline='') as csvfile:
+    # Write the child URLs to a CSV file while crawling, line-buffered so a crash keeps everything found so far
+    with open('child_urls.csv', 'w', newline='', buffering=1) as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(['Child URLs'])
-        writer.writerows([[child_url] for child_url in child_urls])
+
+        # Crawl the web page and its child pages
+        asyncio.run(crawl(url, visited_urls, writer))
 
 if __name__ == '__main__':
     main()
\ No newline at end of file